@@ -0,0 +1,140 @@
+# --- 承認階層グラフ ---
+# 「社員一覧」の承認者列（第一承認者・第二承認者 など）から
+# 承認者 → 社員 の有向グラフを作り、各承認者の配下社員（直属＋間接）を
+# データスナップショットごとに一度だけ前計算する。
+import re
+from array import array
+from collections import deque
+
+# 承認階層をたどる最大の深さ（これより深い配下は打ち切る）
+MAX_APPROVAL_DEPTH = 10
+
+# 「第一承認者」「第二承認者」… を承認者列として扱う
+APPROVER_COLUMN_PATTERN = re.compile(r"^第[一二三四五六七八九十\d]+承認者$")
+
+
+def normalize_key(value):
+    """承認者名・ログインIDの表記ゆれ（前後・姓名間のスペース）を吸収"""
+    if value is None:
+        return ""
+    return re.sub(r"[\s　]+", "", str(value))
+
+
+def find_approver_columns(columns):
+    """承認者列の一覧を取得"""
+    return [col for col in columns if APPROVER_COLUMN_PATTERN.match(str(col))]
+
+
+class ApprovalGraph:
+    """承認階層グラフ（推移閉包を前計算済み）
+
+    社員は「社員一覧」の行番号（0始まりの整数）で表し、
+    各承認者の直属・配下社員を整数配列で保持する。
+    """
+
+    def __init__(self, employee_ids, key_to_node, direct, closure, cycles, truncated, ambiguous=()):
+        self.employee_ids = employee_ids  # 行番号 → 社員番号(str)
+        self.key_to_node = key_to_node    # 正規化済みのログインID/氏名 → ノード番号
+        self.direct = direct              # ノード番号 → array('i')（直属の社員）
+        self.closure = closure            # ノード番号 → array('i')（直属＋間接の社員）
+        self.cycles = cycles              # 検出した循環（社員番号のタプル）
+        self.truncated = truncated        # 深さ上限で打ち切った承認者の社員番号
+        self.ambiguous = ambiguous        # 複数の社員に当たるため使わなかった氏名
+
+    def _node_for(self, *keys):
+        for key in keys:
+            node = self.key_to_node.get(normalize_key(key))
+            if node is not None:
+                return node
+        return None
+
+    def direct_staff(self, *keys):
+        """直属の社員番号一覧（keys はログインID・氏名など）"""
+        node = self._node_for(*keys)
+        if node is None:
+            return []
+        return [self.employee_ids[i] for i in self.direct.get(node, ())]
+
+    def all_staff(self, *keys):
+        """直属＋間接の社員番号一覧（keys はログインID・氏名など）"""
+        node = self._node_for(*keys)
+        if node is None:
+            return []
+        return [self.employee_ids[i] for i in self.closure.get(node, ())]
+
+
+def build_approval_graph(df_staff, max_depth=MAX_APPROVAL_DEPTH):
+    """社員一覧から承認階層グラフを構築し、推移閉包を前計算"""
+    records = df_staff.to_dict("records")
+    approver_columns = find_approver_columns(df_staff.columns)
+
+    employee_ids = [str(r.get("社員番号", "")).strip() for r in records]
+    employee_count = len(records)
+
+    # 社員自身をノードとして登録（ログインID・氏名のどちらでも引けるようにする）
+    key_to_node = {}
+    for i, r in enumerate(records):
+        key = normalize_key(r.get("ログインID", ""))
+        if key and key not in key_to_node:
+            key_to_node[key] = i
+
+    # 同姓同名の社員がいる氏名は、どちらの社員か決められないので登録しない
+    name_to_nodes = {}
+    for i, r in enumerate(records):
+        key = normalize_key(f"{r.get('姓', '')}{r.get('名', '')}")
+        if key:
+            name_to_nodes.setdefault(key, {}).setdefault(employee_ids[i], i)
+    ambiguous = tuple(sorted(key for key, nodes in name_to_nodes.items() if len(nodes) > 1))
+    for key, nodes in name_to_nodes.items():
+        if len(nodes) == 1 and key not in key_to_node:
+            key_to_node[key] = next(iter(nodes.values()))
+    ambiguous_keys = set(ambiguous)
+
+    # 社員一覧に存在しない承認者は、社員の後ろに追加ノードとして登録
+    next_node = employee_count
+    edges = {}
+    for i, r in enumerate(records):
+        for col in approver_columns:
+            key = normalize_key(r.get(col, ""))
+            if not key or key in ambiguous_keys:
+                continue
+            node = key_to_node.get(key)
+            if node is None:
+                node = next_node
+                key_to_node[key] = node
+                next_node += 1
+            if node != i:
+                edges.setdefault(node, []).append(i)
+
+    direct = {node: array("i", sorted(set(children))) for node, children in edges.items()}
+
+    # 承認者ごとに深さ上限付きの幅優先探索で配下社員を収集
+    closure = {}
+    cycles = set()
+    truncated = []
+    for root, children in direct.items():
+        seen = {root}
+        found = []
+        queue = deque((child, 1) for child in children)
+        for child in children:
+            seen.add(child)
+        was_truncated = False
+        while queue:
+            node, depth = queue.popleft()
+            found.append(node)
+            for child in direct.get(node, ()):
+                if child == root:
+                    # 自分自身に戻ってくる承認関係は循環として記録
+                    cycles.add(root)
+                elif child not in seen:
+                    if depth >= max_depth:
+                        was_truncated = True
+                        continue
+                    seen.add(child)
+                    queue.append((child, depth + 1))
+        closure[root] = array("i", sorted(n for n in found if n < employee_count))
+        if was_truncated and root < employee_count:
+            truncated.append(employee_ids[root])
+
+    cycle_ids = tuple(sorted(employee_ids[n] for n in cycles if n < employee_count))
+    return ApprovalGraph(employee_ids, key_to_node, direct, closure, cycle_ids, truncated, ambiguous)
@@ -0,0 +1,82 @@
+# --- 起動時間ベンチマーク ---
+# コールドスタートを想定し、毎回新しいPythonプロセスで
+#   1. hrmos_check.py の import 時間
+#   2. ログイン画面の初回描画時間（streamlit.testing の AppTest）
+# を計測し、その時点で読み込まれている重いモジュールを表示する。
+#
+# 使い方: python bench_startup.py [繰り返し回数]
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ログイン画面の表示までに読み込まれてほしくないモジュール
+HEAVY_MODULES = ["pandas", "requests", "gspread", "google.oauth2", "googleapiclient"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit
+streamlit_loaded = time.perf_counter()
+sys.path.insert(0, {app_dir!r})
+import hrmos_check
+end = time.perf_counter()
+print(json.dumps({{
+    "streamlit": streamlit_loaded - start,
+    "app": end - streamlit_loaded,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+FIRST_PAINT_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app_path!r}, default_timeout=60)
+start = time.perf_counter()
+app.run()
+end = time.perf_counter()
+print(json.dumps({{
+    "first_paint": end - start,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_fresh(script):
+    """新しいPythonプロセスでスクリプトを実行し、最終行のJSONを返す"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=APP_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(label, values):
+    print(f"{label:<24} 中央値 {statistics.median(values) * 1000:8.1f} ms"
+          f"  (最小 {min(values) * 1000:.1f} / 最大 {max(values) * 1000:.1f})")
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    import_script = IMPORT_SCRIPT.format(app_dir=APP_DIR, heavy=HEAVY_MODULES)
+    paint_script = FIRST_PAINT_SCRIPT.format(
+        app_path=os.path.join(APP_DIR, "hrmos_check.py"), heavy=HEAVY_MODULES
+    )
+
+    imports = [run_fresh(import_script) for _ in range(repeat)]
+    paints = [run_fresh(paint_script) for _ in range(repeat)]
+
+    print(f"=== 起動時間ベンチマーク（{repeat}回） ===")
+    summarize("streamlit import", [r["streamlit"] for r in imports])
+    summarize("hrmos_check import", [r["app"] for r in imports])
+    summarize("ログイン画面 初回描画", [r["first_paint"] for r in paints])
+    print(f"import 後の重いモジュール: {imports[-1]['loaded'] or 'なし'}")
+    print(f"初回描画後の重いモジュール: {paints[-1]['loaded'] or 'なし'}")
+
+
+if __name__ == "__main__":
+    main()
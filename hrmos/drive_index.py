@@ -0,0 +1,90 @@
+# --- Google Drive フォルダのファイル索引 ---
+# ファイル名ごとに files().list を呼ぶ代わりに、フォルダ内を一度だけ一覧取得し
+# ファイル名 → {id, md5Checksum, modifiedTime} の索引として短時間キャッシュする。
+# 自分でアップロードしたファイルは再取得せず索引をその場で更新する。
+import threading
+import time
+
+from google_client import get_client
+
+# 索引の有効期間（秒）
+INDEX_TTL_SECONDS = 60
+
+# 一覧取得で受け取る項目（必要最小限）
+LIST_FIELDS = "nextPageToken, files(id, name, md5Checksum, modifiedTime)"
+FILE_FIELDS = "id, name, md5Checksum, modifiedTime"
+
+
+class DriveFolderIndex:
+    """Drive フォルダ内のファイル名 → メタデータの索引"""
+
+    def __init__(self, service, folder_id, ttl=INDEX_TTL_SECONDS, scope=None):
+        self.service = service
+        self.folder_id = folder_id
+        self.ttl = ttl
+        self.scope = scope  # テナントID（API呼び出しの遮断・キャッシュの単位）
+        self._files = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _expired(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def refresh(self):
+        """フォルダ内のファイルを一覧取得して索引を作り直す（ページング対応）"""
+        files = {}
+        page_token = None
+        while True:
+            request = self.service.files().list(
+                q=f"'{self.folder_id}' in parents and trashed=false",
+                spaces="drive",
+                fields=LIST_FIELDS,
+                orderBy="modifiedTime desc",
+                pageSize=1000,
+                pageToken=page_token
+            )
+            # 一覧は作成・更新の判断に使うので、前回取得したページで代用しない（key を渡さない）
+            results = get_client().call("drive.list", request.execute, scope=self.scope)
+            for item in results.get("files", []):
+                # 同名ファイルが複数ある場合は最も新しいものを使う
+                files.setdefault(item["name"], item)
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
+
+        with self._lock:
+            self._files = files
+            self._loaded_at = time.monotonic()
+
+    def get(self, filename):
+        """ファイル名からメタデータを取得（見つからない場合は None）"""
+        if self._expired():
+            self.refresh()
+        with self._lock:
+            return self._files.get(filename)
+
+    def invalidate(self):
+        """次回参照時に一覧を取り直す"""
+        with self._lock:
+            self._loaded_at = None
+
+    def record(self, item):
+        """アップロード結果（id, name, md5Checksum, modifiedTime）で索引を更新"""
+        with self._lock:
+            self._files[item["name"]] = item
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_folder_index(service, folder_id, ttl=INDEX_TTL_SECONDS, scope=None):
+    """フォルダごとの索引を取得（同じプロセス内で共有）"""
+    with _indexes_lock:
+        index = _indexes.get(folder_id)
+        if index is None:
+            index = DriveFolderIndex(service, folder_id, ttl=ttl, scope=scope)
+            _indexes[folder_id] = index
+        else:
+            index.service = service
+        return index
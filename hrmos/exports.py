@@ -0,0 +1,71 @@
+# --- ダウンロード用ファイルの生成 ---
+# ダッシュボードで絞り込み中のデータを CSV（cp932 / UTF-8）・XLSX に書き出す。
+# 生成したファイルはキャッシュして使い回すため、バイト列として一度に作る。
+import io
+
+EXPORT_FORMATS = {
+    "csv_cp932": {
+        "label": "CSV (Shift_JIS)",
+        "extension": "csv",
+        "mime": "text/csv",
+        "encoding": "cp932",
+    },
+    "csv_utf8": {
+        "label": "CSV (UTF-8)",
+        "extension": "csv",
+        "mime": "text/csv",
+        "encoding": "utf-8-sig",  # Excelで文字化けしないようBOM付き
+    },
+    "xlsx": {
+        "label": "Excel (XLSX)",
+        "extension": "xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+}
+
+
+class ExportEncodingError(ValueError):
+    """指定の文字コードで表せない文字がデータに含まれている"""
+
+    def __init__(self, encoding, characters):
+        self.encoding = encoding
+        self.characters = characters
+        super().__init__(f"{encoding} で表せない文字が含まれています: {' '.join(characters)}")
+
+
+def write_csv(df, encoding):
+    """DataFrameをCSVのバイト列に変換（表せない文字があれば ExportEncodingError）"""
+    text = df.to_csv(index=False)
+    try:
+        return text.encode(encoding)
+    except UnicodeEncodeError:
+        characters = []
+        for char in sorted(set(text)):
+            try:
+                char.encode(encoding)
+            except UnicodeEncodeError:
+                characters.append(char)
+        raise ExportEncodingError(encoding, characters) from None
+
+
+def write_xlsx(df, sheet_name="勤怠確認"):
+    """DataFrameをXLSXのバイト列に変換（openpyxl の書き込み専用モード）"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=sheet_name)
+    worksheet.append([str(col) for col in df.columns])
+    for row in df.itertuples(index=False, name=None):
+        worksheet.append(list(row))
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def export_dataframe(df, fmt):
+    """指定形式のダウンロード用バイト列を生成"""
+    spec = EXPORT_FORMATS[fmt]
+    if spec["extension"] == "xlsx":
+        return write_xlsx(df)
+    return write_csv(df, spec["encoding"])
@@ -0,0 +1,257 @@
+# --- Google API 呼び出しの共通ラッパー ---
+# Drive / Sheets の呼び出しを (テナント, endpoint) ごとに
+#   ・再試行（指数バックオフ＋ジッター、Retry-After を尊重）
+#   ・サーキットブレーカー（連続失敗で一定時間遮断し、前回取得したデータを返す）
+#   ・同一リクエストの合流（同時に実行中の同じ呼び出しは1回にまとめる）
+# で包む。同じプロセス内のセッション間で共有する（スクリプトは別プロセスなので別々）。
+import logging
+import random
+import threading
+import time
+
+from tenants import TenantCache
+
+logger = logging.getLogger(__name__)
+
+# 再試行の対象とするHTTPステータス
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# endpoint ごとの再試行設定（attempts: 最大試行回数, base_delay/max_delay: 待ち時間の秒数）
+DEFAULT_POLICY = {"attempts": 4, "base_delay": 1.0, "max_delay": 30.0}
+RETRY_POLICIES = {
+    "drive.list": {"attempts": 5, "base_delay": 1.0, "max_delay": 30.0},
+    "drive.get_media": {"attempts": 5, "base_delay": 1.0, "max_delay": 30.0},
+    # create は冪等でない（サーバー側で作成済みでも失敗に見えることがある）ので再試行しない
+    "drive.create": {"attempts": 1, "base_delay": 2.0, "max_delay": 30.0},
+    "drive.update": {"attempts": 3, "base_delay": 2.0, "max_delay": 30.0},
+    "sheets.open": {"attempts": 5, "base_delay": 1.0, "max_delay": 30.0},
+    "sheets.worksheet": {"attempts": 5, "base_delay": 1.0, "max_delay": 30.0},
+    "sheets.read": {"attempts": 5, "base_delay": 2.0, "max_delay": 60.0},
+    # シートの追加も drive.create と同じく再試行しない
+    "sheets.create": {"attempts": 1, "base_delay": 2.0, "max_delay": 30.0},
+    "sheets.update": {"attempts": 4, "base_delay": 2.0, "max_delay": 60.0},
+    "sheets.format": {"attempts": 4, "base_delay": 2.0, "max_delay": 60.0},
+}
+
+# scope（テナント）を指定しない呼び出しの名前空間
+DEFAULT_SCOPE = "_default"
+
+# サーキットブレーカーの設定
+FAILURE_THRESHOLD = 5        # この回数連続で失敗したら遮断
+RESET_TIMEOUT_SECONDS = 60   # 遮断してから試行を再開するまでの秒数
+
+
+class CircuitOpenError(Exception):
+    """サーキットブレーカーが遮断中で、返せるキャッシュもない"""
+
+
+def error_status(error):
+    """例外からHTTPステータスを取得（googleapiclient / gspread / requests に対応）"""
+    resp = getattr(error, "resp", None)  # googleapiclient.errors.HttpError
+    if resp is not None and getattr(resp, "status", None) is not None:
+        return int(resp.status)
+    response = getattr(error, "response", None)  # gspread.exceptions.APIError / requests
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return int(response.status_code)
+    return None
+
+
+def retry_after(error):
+    """Retry-After ヘッダーの秒数（なければ None）"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        headers = getattr(error, "resp", None)
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    """一時的なエラーか（再試行する価値があるか）"""
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # requests / httplib2 の接続・タイムアウト系の例外
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+class CircuitBreaker:
+    """(テナント, endpoint) ごとのサーキットブレーカー"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """呼び出してよいか（遮断中でも時間が経てば1回だけ試行を許可）"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release_trial(self):
+        """失敗・成功を数えずに試行中の状態だけ解除する（応答が返ってきたがエラーだった場合）"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self.opened_at is not None
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.stale = False
+
+
+class GoogleApiClient:
+    """再試行・サーキットブレーカー・同一リクエスト合流つきの呼び出し口
+
+    前回成功時の結果は store（TenantCache）にテナント単位で保持するため、
+    キャッシュ上限の対象になり、テナントが破棄されれば一緒に消える。
+    """
+
+    def __init__(self, policies=RETRY_POLICIES, sleep=time.sleep, store=None):
+        self.policies = policies
+        self.sleep = sleep
+        self.store = store if store is not None else TenantCache()
+        self._breakers = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint, scope=None):
+        breaker_key = (scope or DEFAULT_SCOPE, endpoint)
+        with self._lock:
+            if breaker_key not in self._breakers:
+                self._breakers[breaker_key] = CircuitBreaker()
+            return self._breakers[breaker_key]
+
+    def is_open(self, endpoint, scope=None):
+        """テナントの endpoint が遮断中か"""
+        return self.breaker(endpoint, scope).is_open
+
+    def call(self, endpoint, func, key=None, scope=None, on_stale=None):
+        """func() を呼び出す
+
+        key を指定した読み取り系の呼び出しは、実行中の同じ (テナント, endpoint, key) に合流し、
+        遮断中・一時的なエラーで再試行切れの場合は前回成功時の結果を返す。
+        前回成功時の結果を返したときは on_stale() を呼ぶ（画面に古いデータである旨を出すため）。
+        scope にはテナントIDを渡す。
+        """
+        scope = scope or DEFAULT_SCOPE
+        if key is None:
+            return self._call_with_retry(endpoint, func, scope)
+
+        flight_key = (scope, endpoint, key)
+        last_good_key = ("last_good", endpoint, key)
+        with self._lock:
+            flight = self._in_flight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = _InFlight()
+                self._in_flight[flight_key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.stale and on_stale is not None:
+                on_stale()
+            return flight.result
+
+        try:
+            try:
+                flight.result = self._call_with_retry(endpoint, func, scope)
+                self.store.put(scope, last_good_key, flight.result)
+            except Exception as e:
+                # 権限エラー・404 などでは古いデータを見せない
+                if not (isinstance(e, CircuitOpenError) or is_retryable(e)):
+                    raise
+                missing = object()
+                last_good = self.store.get(scope, last_good_key, missing)
+                if last_good is missing:
+                    raise
+                flight.result = last_good
+                flight.stale = True
+                logger.warning("%s/%s: 前回取得したデータを返します (%s)", scope, endpoint, e)
+            if flight.stale and on_stale is not None:
+                on_stale()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(flight_key, None)
+            flight.done.set()
+
+    def _call_with_retry(self, endpoint, func, scope):
+        policy = self.policies.get(endpoint, DEFAULT_POLICY)
+        breaker = self.breaker(endpoint, scope)
+
+        for attempt in range(1, policy["attempts"] + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"{endpoint} は一時的に遮断されています")
+            try:
+                result = func()
+            except Exception as e:
+                if not is_retryable(e):
+                    # 応答は返ってきているので遮断の対象にはしないが、
+                    # 成功でもないので失敗回数・遮断状態はそのままにする
+                    breaker.release_trial()
+                    raise
+                breaker.record_failure()
+                if attempt == policy["attempts"]:
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, policy["base_delay"] * 2 ** (attempt - 1))
+                delay = min(delay, policy["max_delay"])
+                logger.info("%s/%s: 再試行します (%d/%d, %.1f秒後): %s",
+                            scope, endpoint, attempt, policy["attempts"], delay, e)
+                self.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client():
+    """プロセス共通のクライアントを取得"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = GoogleApiClient()
+        return _default_client
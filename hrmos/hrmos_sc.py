@@ -4,6 +4,7 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
+import hashlib
 import mimetypes
 import glob
 import time
@@ -15,11 +16,17 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import Select, WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-
-# --- 設定 ---
-download_dir = "/Users/poca/hrmos"
-folder_id = "1tQGYGjOmWR0MBWJ6NpSQ9etg3rxTzvuY"
-json_key_path = "/Users/poca/hrmos/mineral-liberty-460106-m7-a24c4c78154f.json"
+from tenants import get_tenant, require_keys, resolve_tenant_id
+from drive_index import FILE_FIELDS, get_folder_index
+from google_client import get_client
+
+# --- 設定（テナントは 第1引数 または 環境変数 HRMOS_TENANT で指定） ---
+tenant_id = resolve_tenant_id()
+tenant = get_tenant(tenant_id)
+require_keys(tenant_id, tenant, "login_url", "login_id", "password", "service_account_file", "download_dir")
+download_dir = tenant["download_dir"]
+folder_id = tenant["drive_folder_id"]
+json_key_path = tenant["service_account_file"]
 
 # --- 任意の対象月を指定（例：2025年4月） ---
 target_year = 2025
@@ -38,44 +45,67 @@ def wait_for_csv_file(directory, timeout=60):
         seconds += 1
     raise TimeoutError("❌ CSVファイルが見つかりません（タイムアウト）")
 
+# --- Google Drive サービス（プロセス内で使い回す） ---
+_drive_service = None
+
+def get_drive_service():
+    global _drive_service
+    if _drive_service is None:
+        creds = service_account.Credentials.from_service_account_file(
+            json_key_path,
+            scopes=["https://www.googleapis.com/auth/drive"]
+        )
+        _drive_service = build("drive", "v3", credentials=creds)
+    return _drive_service
+
+def file_md5(filepath):
+    md5 = hashlib.md5()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
 # --- Google Driveへアップロード（サービスアカウント使用） ---
 def upload_to_drive(filepath, drive_filename, folder_id):
-    creds = service_account.Credentials.from_service_account_file(
-        json_key_path,
-        scopes=["https://www.googleapis.com/auth/drive"]
-    )
-    service = build("drive", "v3", credentials=creds)
+    service = get_drive_service()
 
     mime_type = mimetypes.guess_type(filepath)[0] or "application/octet-stream"
     media = MediaFileUpload(filepath, mimetype=mime_type)
 
-    # 同名ファイルの検索（上書き対応）
-    results = service.files().list(
-        q=f"name='{drive_filename}' and '{folder_id}' in parents and trashed=false",
-        spaces="drive",
-        fields="files(id, name)"
-    ).execute()
-    items = results.get("files", [])
-
-    if items:
-        file_id = items[0]["id"]
-        service.files().update(
-            fileId=file_id,
-            media_body=media
-        ).execute()
+    # 同名ファイルの検索（フォルダ索引を使い、月ごとの一覧取得を避ける）
+    folder_index = get_folder_index(service, folder_id, scope=tenant_id)
+    existing = folder_index.get(drive_filename)
+
+    if existing and existing.get("md5Checksum") == file_md5(filepath):
+        print(f"⏭️ 内容が同じためスキップ: {drive_filename}")
+        return
+
+    if existing:
+        uploaded_file = get_client().call("drive.update", service.files().update(
+            fileId=existing["id"],
+            media_body=media,
+            fields=FILE_FIELDS
+        ).execute, scope=tenant_id)
         print(f"♻️ 既存ファイルを上書き: {drive_filename}")
     else:
         file_metadata = {
             "name": drive_filename,
             "parents": [folder_id]
         }
-        uploaded_file = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields="id"
-        ).execute()
+        try:
+            uploaded_file = get_client().call("drive.create", service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields=FILE_FIELDS
+            ).execute, scope=tenant_id)
+        except Exception:
+            # サーバー側では作成済みの可能性があるため、再実行時は一覧を取り直して上書きにする
+            folder_index.invalidate()
+            raise
         print(f"🆕 新規ファイルとして作成: {drive_filename}")
 
+    folder_index.record(uploaded_file)
+
     print(f"✅ Google Drive にアップロード完了: {drive_filename}")
 
 # --- Chrome設定 ---
@@ -93,10 +123,10 @@ options.add_argument("--disable-dev-shm-usage")
 driver = None
 try:
     driver = webdriver.Chrome(options=options)
-    driver.get("https://p.ieyasu.co/sho_ei/login/")
+    driver.get(tenant["login_url"])
 
-    driver.find_element(By.ID, "user_login_id").send_keys("a-yoshida@sho-ei.net")
-    driver.find_element(By.ID, "user_password").send_keys("Dx7p3r4i@")
+    driver.find_element(By.ID, "user_login_id").send_keys(tenant["login_id"])
+    driver.find_element(By.ID, "user_password").send_keys(tenant["password"])
     driver.find_element(By.XPATH, "//input[@type='submit' and @value='ログイン']").click()
 
     # レポート画面へ遷移
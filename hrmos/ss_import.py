@@ -7,13 +7,29 @@ from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 import io
+import os
 import gspread
-
-# --- 設定 ---
-json_key_path = "/Users/poca/hrmos/mineral-liberty-460106-m7-a24c4c78154f.json"
-drive_folder_id = "1tQGYGjOmWR0MBWJ6NpSQ9etg3rxTzvuY"
+from tenants import DEFAULT_TENANT_ID, get_tenant, require_keys
+from drive_index import get_folder_index
+from google_client import get_client
+from validation import RESULTS_SHEET_NAME, RULES, ValidationEngine
+
+# --- 設定（テナントはURLパラメータ tenant または 環境変数 HRMOS_TENANT で指定） ---
+tenant_id = st.query_params.get("tenant") or os.environ.get("HRMOS_TENANT", DEFAULT_TENANT_ID)
+try:
+    secrets = st.secrets if st.secrets else None
+except Exception:
+    secrets = None
+try:
+    tenant = get_tenant(tenant_id, secrets)
+    require_keys(tenant_id, tenant, "service_account_file")
+except (KeyError, ValueError) as e:
+    st.error(f"❌ テナント設定エラー: {e}")
+    st.stop()
+json_key_path = tenant["service_account_file"]
+drive_folder_id = tenant["drive_folder_id"]
 target_filename = "kintai_2025-04.csv"
-sheet_url = "https://docs.google.com/spreadsheets/d/1Ymt2OrvY2dKFs9puCX8My7frS_BS1sg3Yev3BLQm9xQ/edit"
+sheet_url = tenant["sheet_url"]
 
 # --- サービスアカウント認証 ---
 scopes = [
@@ -25,29 +41,38 @@ credentials = service_account.Credentials.from_service_account_file(json_key_pat
 drive_service = build("drive", "v3", credentials=credentials)
 gspread_client = gspread.authorize(credentials)
 
-# --- DriveからファイルIDを取得 ---
-results = drive_service.files().list(
-    q=f"name='{target_filename}' and '{drive_folder_id}' in parents and trashed=false",
-    spaces="drive",
-    fields="files(id, name)"
-).execute()
-items = results.get("files", [])
+# --- 勤怠チェック（テナントごとに評価結果を保持） ---
+@st.cache_resource
+def get_validation_engine(tenant_id):
+    return ValidationEngine()
+
+# --- DriveからファイルIDを取得（フォルダ索引から引く） ---
+folder_index = get_folder_index(drive_service, drive_folder_id, scope=tenant_id)
+item = folder_index.get(target_filename)
 
-if not items:
+if not item:
     st.error(f"❌ ファイルが見つかりません: {target_filename}")
 else:
-    file_id = items[0]["id"]
+    file_id = item["id"]
     st.success(f"✅ ファイルを検出: {target_filename}")
 
-    # --- DriveからCSVをダウンロード ---
-    request = drive_service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done:
-        status, done = downloader.next_chunk()
-
-    fh.seek(0)
+    # --- DriveからCSVをダウンロード（失敗時は最初からやり直す） ---
+    def download_file():
+        request = drive_service.files().get_media(fileId=file_id)
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(buffer, request)
+        done = False
+        while not done:
+            status, done = downloader.next_chunk()
+        return buffer.getvalue()
+
+    # 取り込み（書き込み）側では前回取得したデータを使わない（key を渡さない）
+    client = get_client()
+    try:
+        fh = io.BytesIO(client.call("drive.get_media", download_file, scope=tenant_id))
+    except Exception as e:
+        st.error(f"❌ ファイルのダウンロードに失敗しました: {e}")
+        st.stop()
     try:
         df = pd.read_csv(fh, encoding="cp932")
     except UnicodeDecodeError:
@@ -57,6 +82,29 @@ else:
     df = df.fillna("")
     st.dataframe(df)
 
+    # --- 勤怠チェック（前回の取り込みから変わった行のみ再評価） ---
+    engine = None
+    try:
+        engine = get_validation_engine(tenant_id)
+        changed = engine.evaluate(df.columns.tolist(), df.values.tolist())
+        st.info(f"🔍 勤怠チェック: {len(changed)}件の行を再評価しました（全{len(df)}件）")
+        for name, missing in engine.skipped_rules.items():
+            st.warning(f"⚠️ 「{name}」は必要な列（{', '.join(missing)}）がないため評価していません")
+        rule_names = engine.rule_names()
+        violations = engine.violations()
+        if violations:
+            columns = [engine.id_column] + rule_names
+            st.dataframe(pd.DataFrame(violations, columns=columns).fillna(""))
+        elif not rule_names:
+            st.warning("⚠️ 評価できる勤怠チェック項目がありません")
+        elif engine.skipped_rules:
+            st.success(f"✅ 評価した項目（{', '.join(rule_names)}）で該当者はいません")
+        else:
+            st.success("✅ 勤怠チェックで該当者はいません")
+    except KeyError as e:
+        engine = None
+        st.warning(f"⚠️ 勤怠チェックをスキップしました: {e}")
+
     # --- 時間列の定義 ---
     time_columns = [
         '所定内勤務時間',
@@ -88,8 +136,8 @@ else:
 
     # --- スプレッドシートへ書き込み処理 ---
     try:
-        spreadsheet = gspread_client.open_by_url(sheet_url)
-        worksheet = spreadsheet.worksheet("貼り付け用")
+        spreadsheet = client.call("sheets.open", lambda: gspread_client.open_by_url(sheet_url), scope=tenant_id)
+        worksheet = client.call("sheets.worksheet", lambda: spreadsheet.worksheet("貼り付け用"), scope=tenant_id)
 
         # データ前処理
         processed_data = []
@@ -99,8 +147,10 @@ else:
         processed_headers = [preprocess_value(col) for col in df.columns.values.tolist()]
 
         # シートをクリアしてデータ書き込み
-        worksheet.clear()
-        worksheet.update([processed_headers] + processed_data, value_input_option='USER_ENTERED')
+        client.call("sheets.update", worksheet.clear, scope=tenant_id)
+        client.call("sheets.update", lambda: worksheet.update(
+            [processed_headers] + processed_data, value_input_option='USER_ENTERED'
+        ), scope=tenant_id)
 
         # 時間列の書式を整える
         for col_name in time_columns:
@@ -108,14 +158,37 @@ else:
                 col_index = df.columns.get_loc(col_name)
                 col_letter = chr(65 + col_index)  # A〜Z対応（列数が多い場合は gspread.utils.toA1推奨）
                 time_range = f'{col_letter}2:{col_letter}{len(processed_data) + 1}'
-                worksheet.format(time_range, {
+                client.call("sheets.format", lambda: worksheet.format(time_range, {
                     "numberFormat": {
                         "type": "TIME",
                         "pattern": "[h]:mm:ss"
                     }
-                })
+                }), scope=tenant_id)
 
         st.success("✅ '貼り付け用' シートへ更新しました")
 
+        # 勤怠チェック結果を参考用のシートへ書き出す（ダッシュボードには表示しない）
+        if engine is not None:
+            find_results_sheet = lambda: spreadsheet.worksheet(RESULTS_SHEET_NAME)
+            try:
+                results_sheet = client.call("sheets.worksheet", find_results_sheet, scope=tenant_id)
+            except gspread.exceptions.WorksheetNotFound:
+                try:
+                    results_sheet = client.call("sheets.create", lambda: spreadsheet.add_worksheet(
+                        title=RESULTS_SHEET_NAME, rows=1, cols=len(RULES) + 1
+                    ), scope=tenant_id)
+                except Exception as e:
+                    # 作成済みなのに失敗に見えることがあるので、もう一度探してから諦める
+                    try:
+                        results_sheet = client.call("sheets.worksheet", find_results_sheet, scope=tenant_id)
+                    except gspread.exceptions.WorksheetNotFound:
+                        raise e
+            result_table = engine.result_table()
+            client.call("sheets.update", results_sheet.clear, scope=tenant_id)
+            client.call("sheets.update", lambda: results_sheet.update(
+                result_table, value_input_option='RAW'
+            ), scope=tenant_id)
+            st.success(f"✅ '{RESULTS_SHEET_NAME}' シートへ更新しました")
+
     except Exception as e:
         st.error(f"❌ スプレッドシートの更新中にエラーが発生しました: {str(e)}")
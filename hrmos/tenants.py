@@ -0,0 +1,243 @@
+# --- テナント（グループ会社）設定 ---
+# 会社ごとの HRMOS ログインURL・Drive フォルダ・スプレッドシート・
+# サービスアカウントを一元管理し、キャッシュもテナント単位で分離する。
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TENANT_ID = "sho_ei"
+
+# 既定テナント（従来の各スクリプトにハードコードされていた値）
+# HRMOS のログインID・パスワードはソースに置かず、tenants.json / Streamlit Secrets /
+# 環境変数 HRMOS_<テナントID>_LOGIN_ID・HRMOS_<テナントID>_PASSWORD で指定する。
+DEFAULT_TENANTS = {
+    "sho_ei": {
+        "name": "sho_ei",
+        "login_url": "https://p.ieyasu.co/sho_ei/login/",
+        "drive_folder_id": "1tQGYGjOmWR0MBWJ6NpSQ9etg3rxTzvuY",
+        "sheet_url": "https://docs.google.com/spreadsheets/d/1Ymt2OrvY2dKFs9puCX8My7frS_BS1sg3Yev3BLQm9xQ/edit",
+        "service_account_file": "/Users/poca/hrmos/mineral-liberty-460106-m7-a24c4c78154f.json",
+        "secrets_key": "gcp_service_account",
+        "download_dir": "/Users/poca/hrmos",
+    },
+}
+
+# テナント設定ファイル（JSON: {"テナントID": {...}, ...}）
+TENANTS_FILE = os.environ.get(
+    "HRMOS_TENANTS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tenants.json")
+)
+
+# どのテナントにも必要な設定項目
+REQUIRED_KEYS = ["sheet_url", "drive_folder_id"]
+
+# 全テナント合計のキャッシュ上限（MB）
+CACHE_BUDGET_BYTES = int(os.environ.get("HRMOS_CACHE_BUDGET_MB", "512")) * 1024 * 1024
+
+
+def load_tenants(secrets=None):
+    """テナント一覧を取得（既定値 < tenants.json < Streamlit Secrets の順に上書き）"""
+    tenants = {tenant_id: dict(conf) for tenant_id, conf in DEFAULT_TENANTS.items()}
+
+    sources = []
+    if os.path.exists(TENANTS_FILE):
+        with open(TENANTS_FILE, encoding="utf-8") as f:
+            sources.append(json.load(f))
+    if secrets is not None and "tenants" in secrets:
+        sources.append(secrets["tenants"])
+
+    for source in sources:
+        for tenant_id, conf in source.items():
+            merged = dict(tenants.get(tenant_id, {}))
+            merged.update(dict(conf))
+            merged.setdefault("name", tenant_id)
+            merged.setdefault("secrets_key", f"gcp_service_account_{tenant_id}")
+            tenants[tenant_id] = merged
+
+    for tenant_id, conf in tenants.items():
+        # HRMOS の認証情報は環境変数でも指定できる
+        prefix = f"HRMOS_{tenant_id.upper()}_"
+        for key in ("login_id", "password"):
+            value = os.environ.get(prefix + key.upper())
+            if value:
+                conf[key] = value
+        require_keys(tenant_id, conf, *REQUIRED_KEYS)
+    return tenants
+
+
+def require_keys(tenant_id, tenant, *keys):
+    """テナント設定に必要な項目が揃っているか確認（不足していれば ValueError）"""
+    missing = [key for key in keys if not tenant.get(key)]
+    if missing:
+        raise ValueError(f"テナント「{tenant_id}」の設定に {', '.join(missing)} がありません")
+
+
+def get_tenant(tenant_id, secrets=None):
+    """テナント設定を取得（未登録の場合は KeyError）"""
+    tenants = load_tenants(secrets)
+    if tenant_id not in tenants:
+        raise KeyError(f"未登録のテナントです: {tenant_id}")
+    return tenants[tenant_id]
+
+
+def resolve_tenant_id(argv=None):
+    """スクリプト実行時のテナントIDを取得（引数 > 環境変数 HRMOS_TENANT > 既定）"""
+    argv = sys.argv if argv is None else argv
+    if len(argv) > 1 and argv[1]:
+        return argv[1]
+    return os.environ.get("HRMOS_TENANT", DEFAULT_TENANT_ID)
+
+
+def estimate_size(value, _seen=None):
+    """キャッシュ値のおおよそのメモリ使用量（バイト）"""
+    if value is None:
+        return 0
+    # 循環参照・共有オブジェクトを二重に数えない
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if hasattr(value, "memory_usage"):  # pandas.DataFrame
+        try:
+            return int(value.memory_usage(index=True, deep=True).sum())
+        except TypeError:
+            pass
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    if hasattr(value, "itemsize") and hasattr(value, "__len__"):  # array.array
+        return value.itemsize * len(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v, seen) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v, seen) for v in value.values())
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + estimate_size(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+class TenantCache:
+    """テナント単位のキャッシュ
+
+    値はテナントごとの名前空間に保持し、合計サイズが上限を超えたら
+    最も長く使われていないテナントの値をまとめて破棄する（LRU）。
+    それでも上限を超える場合は、書き込み中のテナント内で古いキーから破棄する。
+    depends_on を指定した値（スナップショットから作った値）は、
+    元のキーが更新・破棄されたときに一緒に破棄する。
+    """
+
+    def __init__(self, budget_bytes=CACHE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.RLock()
+        # テナントID → OrderedDict{キー: (値, サイズ, 有効期限, 元のキー)}
+        self._tenants = OrderedDict()
+        self._versions = {}  # (テナントID, キー) → 更新回数
+        self._total = 0
+
+    def get(self, tenant_id, key, default=None):
+        """キャッシュ値を取得（期限切れ・未登録は default）"""
+        with self._lock:
+            entries = self._tenants.get(tenant_id)
+            if entries is None or key not in entries:
+                return default
+            value, _, expires_at, _ = entries[key]
+            if expires_at is not None and expires_at < time.monotonic():
+                self._remove(tenant_id, key)
+                return default
+            entries.move_to_end(key)
+            self._tenants.move_to_end(tenant_id)
+            return value
+
+    def put(self, tenant_id, key, value, ttl=None, depends_on=None):
+        """キャッシュ値を登録"""
+        size = estimate_size(value)
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._remove(tenant_id, key)
+            if depends_on is None:
+                self._versions[(tenant_id, key)] = self._versions.get((tenant_id, key), 0) + 1
+            entries = self._tenants.setdefault(tenant_id, OrderedDict())
+            # 元の値がすでに無い（破棄済み）場合や、上限を超える大きさの値は登録しない
+            if size > self.budget_bytes or (depends_on is not None and depends_on not in entries):
+                if not entries:
+                    del self._tenants[tenant_id]
+                return
+            entries[key] = (value, size, expires_at, depends_on)
+            self._total += size
+            self._tenants.move_to_end(tenant_id)
+            self._sweep()
+            self._evict(keep_tenant=tenant_id, keep_key=key)
+
+    def get_or_compute(self, tenant_id, key, compute, ttl=None, depends_on=None):
+        """キャッシュ値を取得し、なければ compute() の結果を登録（None は登録しない）"""
+        missing = object()
+        value = self.get(tenant_id, key, missing)
+        if value is not missing:
+            return value
+        value = compute()
+        if value is not None:
+            self.put(tenant_id, key, value, ttl=ttl, depends_on=depends_on)
+        return value
+
+    def version(self, tenant_id, key):
+        """キャッシュ値の更新回数（スナップショットの版番号として使う）"""
+        with self._lock:
+            return self._versions.get((tenant_id, key), 0)
+
+    def clear(self, tenant_id=None):
+        """キャッシュを破棄（tenant_id 省略時は全テナント）"""
+        with self._lock:
+            for evicted in list(self._tenants) if tenant_id is None else [tenant_id]:
+                self._drop(evicted)
+
+    def _remove(self, tenant_id, key):
+        """キーと、そのキーから作った値を破棄"""
+        entries = self._tenants.get(tenant_id)
+        if entries is None:
+            return
+        if key in entries:
+            self._total -= entries.pop(key)[1]
+        for dependent in [k for k, entry in entries.items() if entry[3] == key]:
+            self._remove(tenant_id, dependent)
+        if not entries and self._tenants.get(tenant_id) is entries:
+            del self._tenants[tenant_id]
+
+    def _drop(self, tenant_id):
+        entries = self._tenants.pop(tenant_id, None)
+        if entries is not None:
+            self._total -= sum(entry[1] for entry in entries.values())
+        for version_key in [k for k in self._versions if k[0] == tenant_id]:
+            del self._versions[version_key]
+
+    def _sweep(self):
+        """期限切れの値を破棄"""
+        now = time.monotonic()
+        for tenant_id, entries in list(self._tenants.items()):
+            for key in [k for k, entry in entries.items() if entry[2] is not None and entry[2] < now]:
+                self._remove(tenant_id, key)
+
+    def _evict(self, keep_tenant, keep_key):
+        # 他のテナントを古い順にまとめて破棄
+        while self._total > self.budget_bytes:
+            victim = next((t for t in self._tenants if t != keep_tenant), None)
+            if victim is None:
+                break
+            self._drop(victim)
+        # 書き込み中のテナント内で古いキーから破棄
+        while self._total > self.budget_bytes:
+            entries = self._tenants.get(keep_tenant, {})
+            victim = next((k for k in entries if k != keep_key), None)
+            if victim is None:
+                break
+            self._remove(keep_tenant, victim)
+
+    def stats(self):
+        """テナントごとの使用量（バイト）"""
+        with self._lock:
+            return {
+                tenant_id: sum(entry[1] for entry in entries.values())
+                for tenant_id, entries in self._tenants.items()
+            }
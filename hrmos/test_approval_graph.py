@@ -0,0 +1,53 @@
+# --- approval_graph のテスト（python -m pytest hrmos で実行） ---
+from approval_graph import build_approval_graph
+
+
+class StaffFrame:
+    """build_approval_graph が使う DataFrame の一部（columns と to_dict）だけを持つ表"""
+
+    def __init__(self, records):
+        self.records = records
+        self.columns = list(records[0]) if records else []
+
+    def to_dict(self, orient):
+        assert orient == "records"
+        return [dict(r) for r in self.records]
+
+
+def staff(employee_id, login_id, surname, given_name, approver=""):
+    return {"社員番号": employee_id, "ログインID": login_id, "姓": surname, "名": given_name, "第一承認者": approver}
+
+
+def test_closure_includes_indirect_staff():
+    graph = build_approval_graph(StaffFrame([
+        staff("1", "boss", "山田", "太郎"),
+        staff("2", "mid", "佐藤", "花子", "山田 太郎"),
+        staff("3", "member", "鈴木", "一郎", "mid"),
+    ]))
+    assert graph.direct_staff("boss") == ["2"]
+    assert graph.all_staff("boss") == ["2", "3"]
+    assert graph.ambiguous == ()
+
+
+def test_ambiguous_names_are_excluded_and_reported():
+    graph = build_approval_graph(StaffFrame([
+        staff("1", "taro1", "山田", "太郎"),
+        staff("2", "taro2", "山田", "太郎"),
+        staff("3", "member", "鈴木", "一郎", "山田太郎"),
+        staff("4", "other", "佐藤", "花子", "taro2"),
+    ]))
+    assert graph.ambiguous == ("山田太郎",)
+    assert graph.all_staff("taro1", "山田太郎") == []
+    assert graph.all_staff("山田太郎") == []
+    # ログインIDでの一致は同姓同名の影響を受けない
+    assert graph.all_staff("taro2", "山田太郎") == ["4"]
+
+
+def test_duplicate_rows_of_same_employee_are_not_ambiguous():
+    graph = build_approval_graph(StaffFrame([
+        staff("1", "boss", "山田", "太郎"),
+        staff("1", "boss", "山田", "太郎"),
+        staff("2", "member", "鈴木", "一郎", "山田太郎"),
+    ]))
+    assert graph.ambiguous == ()
+    assert graph.all_staff("山田太郎") == ["2"]
@@ -0,0 +1,28 @@
+# --- exports のテスト（python -m pytest hrmos で実行） ---
+import pytest
+
+from exports import ExportEncodingError, export_dataframe
+
+
+class CsvFrame:
+    """export_dataframe が CSV 作成に使う DataFrame の一部（to_csv）だけを持つ表"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def to_csv(self, index=False):
+        return self.text
+
+
+def test_cp932_export():
+    assert export_dataframe(CsvFrame("名前\n山田\n"), "csv_cp932") == "名前\n山田\n".encode("cp932")
+
+
+def test_cp932_export_rejects_unencodable_characters():
+    with pytest.raises(ExportEncodingError) as excinfo:
+        export_dataframe(CsvFrame("名前\n𠮷田\n"), "csv_cp932")
+    assert excinfo.value.characters == ["𠮷"]
+
+
+def test_utf8_export_keeps_all_characters():
+    assert export_dataframe(CsvFrame("名前\n𠮷田\n"), "csv_utf8").decode("utf-8-sig") == "名前\n𠮷田\n"
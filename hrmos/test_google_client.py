@@ -0,0 +1,220 @@
+# --- google_client のテスト（python -m pytest hrmos で実行） ---
+import threading
+import time
+
+import pytest
+
+from google_client import (
+    FAILURE_THRESHOLD, CircuitBreaker, CircuitOpenError, GoogleApiClient,
+)
+
+
+class HttpError(Exception):
+    """googleapiclient.errors.HttpError と同じく resp.status を持つ例外"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Resp", (), {"status": status})()
+
+
+def make_client():
+    sleeps = []
+    return GoogleApiClient(sleep=sleeps.append), sleeps
+
+
+def fail(status):
+    def func():
+        raise HttpError(status)
+    return func
+
+
+# --- CircuitBreaker ---
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()  # 試行中は他の呼び出しを通さない
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_breaker_reopens_when_trial_fails():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+
+
+# --- 再試行 ---
+def test_retries_retryable_errors_then_succeeds():
+    client, sleeps = make_client()
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) < 3:
+            raise HttpError(503)
+        return "ok"
+
+    assert client.call("drive.list", func) == "ok"
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_does_not_retry_non_retryable_errors():
+    client, sleeps = make_client()
+    with pytest.raises(HttpError):
+        client.call("drive.list", fail(403))
+    assert sleeps == []
+
+
+@pytest.mark.parametrize("endpoint", ["drive.create", "sheets.create"])
+def test_create_is_attempted_once(endpoint):
+    client, sleeps = make_client()
+    calls = []
+
+    def func():
+        calls.append(1)
+        raise HttpError(503)
+
+    with pytest.raises(HttpError):
+        client.call(endpoint, func)
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_non_retryable_error_keeps_failure_count():
+    client, _ = make_client()
+    breaker = client.breaker("drive.update")
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    with pytest.raises(HttpError):
+        client.call("drive.update", fail(404))
+    assert breaker.failures == FAILURE_THRESHOLD - 1
+    assert not breaker.is_open
+
+
+def test_non_retryable_error_does_not_close_half_open_breaker():
+    client, _ = make_client()
+    breaker = client.breaker("sheets.worksheet")
+    breaker.reset_timeout = 0
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+    assert breaker.is_open
+
+    with pytest.raises(HttpError):
+        client.call("sheets.worksheet", fail(404))  # 半開の試行が 404 で終わった
+    assert breaker.is_open
+    assert breaker.failures == FAILURE_THRESHOLD
+    assert breaker.allow()  # 次の試行は通す
+
+
+def test_breakers_are_scoped_per_tenant():
+    client, _ = make_client()
+    for _ in range(FAILURE_THRESHOLD):
+        client.breaker("sheets.read", scope="a").record_failure()
+    with pytest.raises(CircuitOpenError):
+        client.call("sheets.read", lambda: "a", scope="a")
+    assert client.call("sheets.read", lambda: "b", scope="b") == "b"
+
+
+# --- 同一リクエストの合流 ---
+def test_concurrent_calls_with_same_key_are_merged():
+    client, _ = make_client()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+
+    def worker():
+        results.append(client.call("sheets.read", func, key="k", scope="a"))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.2)  # 後続の呼び出しが合流するのを待つ
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+
+
+def test_calls_without_key_are_not_merged():
+    client, _ = make_client()
+    calls = []
+
+    def func():
+        calls.append(1)
+        return len(calls)
+
+    assert client.call("sheets.read", func) == 1
+    assert client.call("sheets.read", func) == 2
+
+
+# --- 前回取得したデータでの代用 ---
+def test_stale_fallback_on_retryable_error():
+    client, _ = make_client()
+    assert client.call("sheets.read", lambda: "fresh", key="k", scope="a") == "fresh"
+    assert client.call("sheets.read", fail(503), key="k", scope="a") == "fresh"
+
+
+def test_stale_fallback_when_breaker_is_open():
+    client, _ = make_client()
+    assert client.call("sheets.read", lambda: "fresh", key="k", scope="a") == "fresh"
+    for _ in range(FAILURE_THRESHOLD):
+        client.breaker("sheets.read", scope="a").record_failure()
+    assert client.call("sheets.read", lambda: "new", key="k", scope="a") == "fresh"
+
+
+@pytest.mark.parametrize("status", [403, 404])
+def test_no_stale_fallback_on_non_retryable_error(status):
+    client, _ = make_client()
+    client.call("sheets.read", lambda: "fresh", key="k", scope="a")
+    with pytest.raises(HttpError):
+        client.call("sheets.read", fail(status), key="k", scope="a")
+
+
+def test_no_stale_fallback_without_key():
+    client, _ = make_client()
+    client.call("drive.get_media", lambda: b"old", scope="a")
+    with pytest.raises(HttpError):
+        client.call("drive.get_media", fail(503), scope="a")
+
+
+def test_stale_data_is_not_shared_between_tenants():
+    client, _ = make_client()
+    client.call("sheets.read", lambda: "a's data", key="k", scope="a")
+    with pytest.raises(HttpError):
+        client.call("sheets.read", fail(503), key="k", scope="b")
+
+
+def test_on_stale_is_called_only_for_stale_results():
+    client, _ = make_client()
+    stale = []
+    client.call("sheets.open", lambda: "fresh", key="k", scope="a", on_stale=lambda: stale.append(1))
+    assert stale == []
+    client.call("sheets.open", fail(503), key="k", scope="a", on_stale=lambda: stale.append(1))
+    assert stale == [1]
@@ -0,0 +1,31 @@
+# --- validation のテスト（python -m pytest hrmos で実行） ---
+from validation import ValidationEngine
+
+HEADERS = [
+    "社員番号", "所定外休日勤務時間", "法定外休日勤務時間", "法定休日勤務時間",
+    "欠勤日数", "勤務時間", "実勤務時間", "遅刻時間", "早退時間", "確定_有給なし_残業時間",
+]
+
+
+def test_all_rules_evaluated_when_columns_present():
+    engine = ValidationEngine()
+    engine.evaluate(HEADERS, [["1", "0:00", "0:00", "0:00", "1", "8:00", "8:00", "0:00", "0:00", "61:00"]])
+    assert engine.skipped_rules == {}
+    assert engine.violations() == [{"社員番号": "1", "欠勤日数": 1, "60時間超過残業": "1:00"}]
+
+
+def test_rules_with_missing_columns_are_skipped():
+    engine = ValidationEngine()
+    engine.evaluate(["社員番号", "欠勤日数"], [["1", "0"]])
+    assert engine.rule_names() == ["欠勤日数"]
+    assert engine.skipped_rules["打刻ズレ"] == ["勤務時間", "実勤務時間"]
+    assert engine.result_table() == [["社員番号", "欠勤日数"], ["1", ""]]
+
+
+def test_only_changed_rows_are_reevaluated():
+    engine = ValidationEngine()
+    rows = [["1", "0"], ["2", "0"]]
+    assert engine.evaluate(["社員番号", "欠勤日数"], rows) == ["1", "2"]
+    rows[1] = ["2", "2"]
+    assert engine.evaluate(["社員番号", "欠勤日数"], rows) == ["2"]
+    assert engine.violations() == [{"社員番号": "2", "欠勤日数": 2}]
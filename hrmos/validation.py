@@ -0,0 +1,210 @@
+# --- 勤怠チェック ---
+# 「勤怠確認シート(打刻管理)」の数式で行っているチェックをアプリ側で評価する。
+# 行ごとの内容ハッシュを保持し、前回の取り込みから変わった行だけを再評価する。
+# 列名は HRMOS の月次集計データ出力（CSV）に合わせている。
+#
+# 注意: シート側の数式はこのリポジトリに含まれていないため、各チェックは
+# 同名のシート列を意図した独自の定義であり、数式との一致は未確認。
+# 結果は「勤怠確認シート(打刻管理)」の値を置き換えず、「勤怠チェック結果」シートに
+# 別途書き出すだけにする。シートとの一致を確認するまではダッシュボード・ダウンロードには出さない。
+import hashlib
+import re
+import threading
+
+EMPLOYEE_ID_COLUMN = "社員番号"
+
+# 評価結果の書き出し先シート
+RESULTS_SHEET_NAME = "勤怠チェック結果"
+
+HOLIDAY_WORK_COLUMNS = ["所定外休日勤務時間", "法定外休日勤務時間", "法定休日勤務時間"]
+ABSENCE_COLUMN = "欠勤日数"
+SCHEDULED_WORK_COLUMN = "勤務時間"
+ACTUAL_WORK_COLUMN = "実勤務時間"
+ATTENDANCE_MINUS_COLUMNS = ["遅刻時間", "早退時間"]
+OVERTIME_COLUMN = "確定_有給なし_残業時間"
+
+# 60時間超過残業の基準（分）
+OVERTIME_LIMIT_MINUTES = 60 * 60
+
+# 打刻ズレとみなす勤務時間と実勤務時間の差（分）
+# シートの判定基準が不明なため暫定値。差が少しでもあれば全員が該当しないよう幅を持たせる
+STAMP_GAP_TOLERANCE_MINUTES = 15
+
+TIME_PATTERN = re.compile(r"^(-?)(\d{1,3}):(\d{2})(?::(\d{2}))?$")
+
+
+def to_minutes(value):
+    """「h:mm」「h:mm:ss」形式・数値を分に変換（変換できない場合は 0）"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 0 if value != value else value  # NaN は 0
+    text = str(value).replace("'", "").strip()
+    match = TIME_PATTERN.match(text)
+    if match:
+        sign, hours, minutes, seconds = match.groups()
+        total = int(hours) * 60 + int(minutes) + int(seconds or 0) / 60
+        return -total if sign else total
+    try:
+        return float(text)
+    except ValueError:
+        return 0
+
+
+def to_number(value):
+    """数値に変換（変換できない場合は 0）"""
+    try:
+        number = float(str(value).replace("'", "").strip())
+    except ValueError:
+        return 0
+    return 0 if number != number else number
+
+
+def format_minutes(minutes):
+    """分を「h:mm」形式に変換"""
+    minutes = int(round(minutes))
+    sign = "-" if minutes < 0 else ""
+    return f"{sign}{abs(minutes) // 60}:{abs(minutes) % 60:02}"
+
+
+# --- チェック項目（違反がなければ None を返す） ---
+def check_holiday_work(row):
+    """休日出勤: 所定外休日・法定外休日・法定休日勤務時間の合計が 0 より大きい"""
+    total = sum(to_minutes(row.get(col)) for col in HOLIDAY_WORK_COLUMNS)
+    return format_minutes(total) if total > 0 else None
+
+
+def check_absence(row):
+    """欠勤日数: 欠勤日数が 0 より大きい"""
+    days = to_number(row.get(ABSENCE_COLUMN))
+    if days <= 0:
+        return None
+    return int(days) if days.is_integer() else days
+
+
+def check_stamp_gap(row):
+    """打刻ズレ: 勤務時間と実勤務時間の差が STAMP_GAP_TOLERANCE_MINUTES を超える"""
+    gap = abs(to_minutes(row[SCHEDULED_WORK_COLUMN]) - to_minutes(row[ACTUAL_WORK_COLUMN]))
+    return format_minutes(gap) if gap > STAMP_GAP_TOLERANCE_MINUTES else None
+
+
+def check_attendance_minus(row):
+    """勤怠マイナス分: 遅刻時間・早退時間の合計が 0 より大きい"""
+    total = sum(to_minutes(row.get(col)) for col in ATTENDANCE_MINUS_COLUMNS)
+    return format_minutes(total) if total > 0 else None
+
+
+def check_overtime_over_60h(row):
+    """60時間超過残業: 確定_有給なし_残業時間のうち 60時間を超えた分"""
+    excess = to_minutes(row.get(OVERTIME_COLUMN)) - OVERTIME_LIMIT_MINUTES
+    return format_minutes(excess) if excess > 0 else None
+
+
+# columns: 評価に必要な列（1つでも欠けていれば評価せずスキップ扱いにする）
+RULES = [
+    {"name": "休日出勤", "check": check_holiday_work, "columns": HOLIDAY_WORK_COLUMNS},
+    {"name": "欠勤日数", "check": check_absence, "columns": [ABSENCE_COLUMN]},
+    {"name": "打刻ズレ", "check": check_stamp_gap, "columns": [SCHEDULED_WORK_COLUMN, ACTUAL_WORK_COLUMN]},
+    {"name": "勤怠マイナス分", "check": check_attendance_minus, "columns": ATTENDANCE_MINUS_COLUMNS},
+    {"name": "60時間超過残業", "check": check_overtime_over_60h, "columns": [OVERTIME_COLUMN]},
+]
+
+
+def row_hash(values):
+    """行の内容ハッシュ"""
+    joined = "\x1f".join("" if v is None else str(v) for v in values)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=16).digest()
+
+
+class ValidationEngine:
+    """勤怠チェックの評価結果を社員ごとに保持し、変更行だけ再評価する"""
+
+    def __init__(self, rules=RULES, id_column=EMPLOYEE_ID_COLUMN):
+        self.rules = rules
+        self.id_column = id_column
+        self.row_hashes = {}  # 社員番号 → 行の内容ハッシュ
+        self.results = {}     # 社員番号 → {チェック項目: 値}
+        self.active_rules = list(rules)
+        self.skipped_rules = {}  # 必要な列がなく評価できないチェック項目 → 不足している列
+        self._headers_hash = None
+        self._lock = threading.Lock()
+
+    def evaluate(self, headers, rows):
+        """取り込んだ行を評価し、再評価した社員番号の一覧を返す"""
+        headers = [str(h) for h in headers]
+        if self.id_column not in headers:
+            raise KeyError(f"「{self.id_column}」列が見つかりません")
+        id_index = headers.index(self.id_column)
+
+        with self._lock:
+            # 列構成が変わった場合は全行を評価し直す
+            headers_hash = row_hash(headers)
+            if headers_hash != self._headers_hash:
+                self.row_hashes.clear()
+                self.results.clear()
+                self._headers_hash = headers_hash
+                self.active_rules = []
+                self.skipped_rules = {}
+                for rule in self.rules:
+                    missing = [col for col in rule.get("columns", []) if col not in headers]
+                    if missing:
+                        self.skipped_rules[rule["name"]] = missing
+                    else:
+                        self.active_rules.append(rule)
+
+            seen = set()
+            changed = []
+            for values in rows:
+                employee_id = str(values[id_index]).strip()
+                if not employee_id:
+                    continue
+                seen.add(employee_id)
+
+                digest = row_hash(values)
+                if self.row_hashes.get(employee_id) == digest:
+                    continue
+
+                row = dict(zip(headers, values))
+                violations = {}
+                for rule in self.active_rules:
+                    value = rule["check"](row)
+                    if value is not None:
+                        violations[rule["name"]] = value
+                self.results[employee_id] = violations
+                self.row_hashes[employee_id] = digest
+                changed.append(employee_id)
+
+            # 今回の取り込みに含まれない社員は破棄
+            for employee_id in set(self.row_hashes) - seen:
+                del self.row_hashes[employee_id]
+                del self.results[employee_id]
+
+        return changed
+
+    def rule_names(self):
+        """評価したチェック項目名（スキップしたものは含まない）"""
+        with self._lock:
+            return [rule["name"] for rule in self.active_rules]
+
+    def result_table(self):
+        """「勤怠チェック結果」シートに書き出す表（ヘッダー行＋全社員の行）
+
+        スキップしたチェック項目は「該当なし」と区別できるよう列ごと含めない。
+        """
+        names = self.rule_names()
+        with self._lock:
+            rows = [
+                [employee_id] + [violations.get(name, "") for name in names]
+                for employee_id, violations in sorted(self.results.items())
+            ]
+        return [[self.id_column] + names] + rows
+
+    def violations(self):
+        """違反のある社員の一覧（社員番号と各チェック項目の値）"""
+        with self._lock:
+            return [
+                {self.id_column: employee_id, **violations}
+                for employee_id, violations in self.results.items()
+                if violations
+            ]
+